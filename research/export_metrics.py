@@ -11,18 +11,40 @@ Usage:
 """
 
 import argparse
-import json
+import contextlib
 import csv
+import functools
+import hashlib
+import json
+import os
+import re
+import shelve
 import sys
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("ERROR: requests is required. Install with: pip install requests")
     sys.exit(1)
 
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process locking
+    fcntl = None
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 
 # Prometheus queries for scheduler research
 METRICS_QUERIES = {
@@ -36,14 +58,9 @@ METRICS_QUERIES = {
     "scheduler_attempts_unschedulable": 'sum(scheduler_schedule_attempts_total{result="unschedulable"})',
     
     # Control-Plane Overhead
-    "scheduler_cpu_usage_millicores": 'sum(rate(container_cpu_usage_seconds_total{container="kube-scheduler"}[5m])) * 1000',
-    "scheduler_memory_mb": 'sum(container_memory_working_set_bytes{container="kube-scheduler"}) / 1024 / 1024',
-    
     # API Server
     "apiserver_request_rate": 'sum(rate(apiserver_request_total[5m]))',
     "apiserver_request_latency_p99": 'histogram_quantile(0.99, sum(rate(apiserver_request_duration_seconds_bucket[5m])) by (le))',
-    "apiserver_cpu_usage_millicores": 'sum(rate(container_cpu_usage_seconds_total{container="kube-apiserver"}[5m])) * 1000',
-    "apiserver_memory_mb": 'sum(container_memory_working_set_bytes{container="kube-apiserver"}) / 1024 / 1024',
     
     # etcd
     "etcd_request_rate": 'sum(rate(etcd_request_duration_seconds_count[5m]))',
@@ -58,12 +75,27 @@ METRICS_QUERIES = {
     "total_pending_pods": 'count(kube_pod_status_phase{phase="Pending"})',
 }
 
+# Control-plane container overhead: metric name -> (resource, container).
+# These are evaluated as one grouped query per resource (see container_group_queries).
+CONTAINER_METRICS = {
+    "scheduler_cpu_usage_millicores": ("cpu", "kube-scheduler"),
+    "scheduler_memory_mb": ("memory", "kube-scheduler"),
+    "apiserver_cpu_usage_millicores": ("cpu", "kube-apiserver"),
+    "apiserver_memory_mb": ("memory", "kube-apiserver"),
+}
+
+# Per-container resource queries, split client-side by the `container` label
+CONTAINER_GROUP_QUERIES = {
+    "cpu": 'sum by (container) (rate(container_cpu_usage_seconds_total{{container=~"{containers}"}}[5m])) * 1000',
+    "memory": 'sum by (container) (container_memory_working_set_bytes{{container=~"{containers}"}}) / 1024 / 1024',
+}
+
 # Volcano-specific metrics (if Volcano is installed)
-VOLCANO_QUERIES = {
-    "volcano_scheduler_cpu_millicores": 'sum(rate(container_cpu_usage_seconds_total{container="volcano-scheduler"}[5m])) * 1000',
-    "volcano_scheduler_memory_mb": 'sum(container_memory_working_set_bytes{container="volcano-scheduler"}) / 1024 / 1024',
-    "volcano_controller_cpu_millicores": 'sum(rate(container_cpu_usage_seconds_total{container="volcano-controllers"}[5m])) * 1000',
-    "volcano_controller_memory_mb": 'sum(container_memory_working_set_bytes{container="volcano-controllers"}) / 1024 / 1024',
+VOLCANO_CONTAINER_METRICS = {
+    "volcano_scheduler_cpu_millicores": ("cpu", "volcano-scheduler"),
+    "volcano_scheduler_memory_mb": ("memory", "volcano-scheduler"),
+    "volcano_controller_cpu_millicores": ("cpu", "volcano-controllers"),
+    "volcano_controller_memory_mb": ("memory", "volcano-controllers"),
 }
 
 # NEXUS-specific metrics (if NEXUS is installed)
@@ -72,52 +104,277 @@ NEXUS_QUERIES = {
     "nexus_pending_pods": 'nexus_pending_pods',
     "nexus_pods_scheduled_total": 'nexus_pods_scheduled_total',
     "nexus_state_changes_total": 'nexus_state_changes_total',
-    "nexus_scheduler_cpu_millicores": 'sum(rate(container_cpu_usage_seconds_total{container="nexus-scheduler"}[5m])) * 1000',
-    "nexus_scheduler_memory_mb": 'sum(container_memory_working_set_bytes{container="nexus-scheduler"}) / 1024 / 1024',
 }
+NEXUS_CONTAINER_METRICS = {
+    "nexus_scheduler_cpu_millicores": ("cpu", "nexus-scheduler"),
+    "nexus_scheduler_memory_mb": ("memory", "nexus-scheduler"),
+}
+
+
+def container_group_queries(container_metrics: Dict[str, Tuple[str, str]]) -> Dict[str, str]:
+    """Build one grouped query per resource, keyed `_<resource>_group`."""
+    containers: Dict[str, List[str]] = {}
+    for resource, container in container_metrics.values():
+        names = containers.setdefault(resource, [])
+        if container not in names:
+            names.append(container)
+    return {
+        f"_{resource}_group": CONTAINER_GROUP_QUERIES[resource].format(containers="|".join(names))
+        for resource, names in containers.items()
+    }
+
+
+# Parallelism for instant queries; the pool is sized to keep every worker on a warm connection
+QUERY_WORKERS = 16
+POOL_SIZE = 32
+
+# Parallelism for reading exported metrics files in --compare mode
+FILE_WORKERS = 8
+
+# Synthetic label used to tag each expression when instant queries are unioned into one request
+BATCH_LABEL = "export_metric"
+
+# Label that grouped (underscore-prefixed) queries are split by
+GROUP_LABEL = "container"
+
+# An instant query's value; grouped queries yield one value per GROUP_LABEL value
+QueryValue = Union[Optional[float], Dict[str, float]]
+
+
+def is_grouped(metric_name: str) -> bool:
+    return metric_name.startswith("_")
+
+
+def sample_value(result: Dict[str, Any]) -> Optional[float]:
+    """Convert an instant-vector sample to a float, mapping NaN to None."""
+    value = float(result["value"][1])
+    return value if not (value != value) else None  # NaN check
+
+
+def build_batch_query(queries: Dict[str, str]) -> str:
+    """Union instant queries into one expression, tagging each result with its metric name."""
+    return " or ".join(
+        f'label_replace({query}, "{BATCH_LABEL}", "{name}", "", "")'
+        for name, query in queries.items()
+    )
+
+
+def make_session() -> requests.Session:
+    """Create an HTTP session with a keep-alive connection pool and light retries."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE,
+        pool_maxsize=POOL_SIZE,
+        max_retries=Retry(total=2, backoff_factor=0.1),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+CACHE_DIR = os.path.expanduser("~/.cache/export_metrics")
+
+
+class DiskCache:
+    """On-disk TTL cache for query results, shared across invocations.
+    
+    The cache is best effort: if the cache file cannot be created or read, a
+    warning is printed and the cache is disabled for the rest of the run.
+    Access is serialized across processes with a lock file where fcntl exists,
+    since the dbm backend may have no locking of its own.
+    """
+    
+    def __init__(self, ttl: float, cache_dir: str = CACHE_DIR):
+        self.ttl = ttl
+        self.path: Optional[str] = os.path.join(cache_dir, "queries")
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            self._disable(e)
+    
+    def _disable(self, error: Exception):
+        if self.path is not None:
+            print(f"  Warning: Query cache disabled ({error})")
+            self.path = None
+    
+    @contextlib.contextmanager
+    def _open(self):
+        with self._lock, open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with shelve.open(self.path) as db:
+                yield db
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()
+    
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None if missing or expired."""
+        if self.path is None:
+            return None
+        try:
+            with self._open() as db:
+                entry = db.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+        except Exception as e:  # dbm, OS and unpickling errors from a bad cache file
+            self._disable(e)
+            return None
+        return value if time.time() < expires_at else None
+    
+    def set(self, key: str, value: Any):
+        if self.path is None:
+            return
+        try:
+            with self._open() as db:
+                db[key] = (time.time() + self.ttl, value)
+        except Exception as e:
+            self._disable(e)
 
 
 class PrometheusClient:
     """Simple Prometheus HTTP API client."""
     
-    def __init__(self, url: str):
+    def __init__(
+        self,
+        url: str,
+        session: Optional[requests.Session] = None,
+        cache: Optional[DiskCache] = None
+    ):
         self.base_url = url.rstrip('/')
+        self.session = session or make_session()
+        self.cache = cache
+    
+    def _cached(self, key_parts: tuple, fetch: Callable[[], Any]) -> Any:
+        """Serve a result from the cache, fetching and storing it on a miss."""
+        if self.cache is None:
+            return fetch()
+        key = DiskCache.make_key(self.base_url, *key_parts)
+        value = self.cache.get(key)
+        if value is None:
+            value = fetch()
+            # Failed or empty results are not cached so they are retried next run
+            if value is not None and value != []:
+                self.cache.set(key, value)
+        return value
     
     def query(self, query: str) -> Optional[float]:
         """Execute an instant query and return the value."""
+        return self._cached(("query", query), lambda: self._query(query))
+    
+    def _query(self, query: str) -> Optional[float]:
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/v1/query",
                 params={"query": query},
                 timeout=10
             )
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             
             if data["status"] == "success" and data["data"]["result"]:
-                result = data["data"]["result"][0]
-                value = float(result["value"][1])
-                return value if not (value != value) else None  # NaN check
+                return sample_value(data["data"]["result"][0])
+            return None
+        except Exception as e:
+            print(f"  Warning: Query failed - {query[:50]}... ({e})")
             return None
+    
+    def query_grouped(self, query: str, label: str = GROUP_LABEL) -> Optional[Dict[str, float]]:
+        """Execute an instant query and return its values keyed by `label`, or None on failure."""
+        return self._cached(("query_grouped", query, label), lambda: self._query_grouped(query, label))
+    
+    def _query_grouped(self, query: str, label: str) -> Optional[Dict[str, float]]:
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/v1/query",
+                params={"query": query},
+                timeout=10
+            )
+            response.raise_for_status()
+            data = json_loads(response.content)
         except Exception as e:
             print(f"  Warning: Query failed - {query[:50]}... ({e})")
             return None
+        
+        if data["status"] != "success":
+            return None
+        values = {}
+        for result in data["data"]["result"]:
+            value = sample_value(result)
+            if value is not None:
+                values.setdefault(result["metric"].get(label), value)
+        return values
     
-    def query_range(self, query: str, start: datetime, end: datetime, step: str = "15s") -> List[tuple]:
-        """Execute a range query and return time series."""
+    def query_batch(self, queries: Dict[str, str]) -> Optional[Dict[str, QueryValue]]:
+        """Evaluate many instant queries in a single request.
+        
+        Grouped (underscore-prefixed) queries map to a dict keyed by GROUP_LABEL.
+        Returns None if the batch could not be evaluated, so callers can fall back
+        to per-query requests.
+        """
+        return self._cached(
+            ("batch", *sorted(queries.items())), lambda: self._query_batch(queries)
+        )
+    
+    def _query_batch(self, queries: Dict[str, str]) -> Optional[Dict[str, QueryValue]]:
         try:
-            response = requests.get(
+            response = self.session.post(
+                f"{self.base_url}/api/v1/query",
+                data={"query": build_batch_query(queries)},
+                timeout=30
+            )
+            response.raise_for_status()
+            data = json_loads(response.content)
+            if data["status"] != "success":
+                return None
+        except Exception as e:
+            print(f"  Warning: Batched query failed, querying individually ({e})")
+            return None
+        
+        values: Dict[str, QueryValue] = {
+            name: {} if is_grouped(name) else None for name in queries
+        }
+        seen = set()
+        for result in data["data"]["result"]:
+            name = result["metric"].get(BATCH_LABEL)
+            if name not in values:
+                continue
+            if is_grouped(name):
+                value = sample_value(result)
+                if value is not None:
+                    values[name].setdefault(result["metric"].get(GROUP_LABEL), value)
+            elif name not in seen:
+                seen.add(name)
+                values[name] = sample_value(result)
+        return values
+    
+    def query_range(self, query: str, start: float, end: float, step: str = "15s") -> List[tuple]:
+        """Execute a range query and return time series.
+        
+        `start` and `end` are Unix timestamps, which the Prometheus API accepts directly.
+        """
+        return self._cached(
+            ("query_range", query, step, end - start),
+            lambda: self._query_range(query, start, end, step)
+        )
+    
+    def _query_range(self, query: str, start: float, end: float, step: str) -> List[tuple]:
+        try:
+            response = self.session.get(
                 f"{self.base_url}/api/v1/query_range",
                 params={
                     "query": query,
-                    "start": start.isoformat() + "Z",
-                    "end": end.isoformat() + "Z",
+                    "start": start,
+                    "end": end,
                     "step": step,
                 },
                 timeout=30
             )
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             
             if data["status"] == "success" and data["data"]["result"]:
                 values = data["data"]["result"][0].get("values", [])
@@ -128,20 +385,49 @@ class PrometheusClient:
             return []
 
 
+def query_concurrently(client: PrometheusClient, queries: Dict[str, str]) -> Dict[str, QueryValue]:
+    """Issue one instant query per metric, in parallel over the client's session."""
+    values = {}
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        futures = {
+            executor.submit(client.query_grouped if is_grouped(name) else client.query, query): name
+            for name, query in queries.items()
+        }
+        for future in as_completed(futures):
+            values[futures[future]] = future.result()
+    return values
+
+
 def export_instant_metrics(
     client: PrometheusClient,
     queries: Dict[str, str],
-    scheduler_name: str
+    scheduler_name: str,
+    container_metrics: Optional[Dict[str, Tuple[str, str]]] = None
 ) -> Dict[str, Any]:
-    """Export instant metric values."""
+    """Export instant metric values using a single batched query where possible.
+    
+    Container resource metrics are fetched through one grouped query per
+    resource and split back into their individual metric names.
+    """
     results = {
         "scheduler": scheduler_name,
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "metrics": {}
     }
     
-    for metric_name, query in queries.items():
-        value = client.query(query)
+    container_metrics = container_metrics or {}
+    all_queries = {**queries, **container_group_queries(container_metrics)}
+    values = client.query_batch(all_queries)
+    if values is None:
+        values = query_concurrently(client, all_queries)
+    
+    # A failed grouped query leaves every container metric of that resource N/A
+    for metric_name, (resource, container) in container_metrics.items():
+        values[metric_name] = (values[f"_{resource}_group"] or {}).get(container)
+    
+    # Report in query order rather than completion order
+    for metric_name in (*queries, *container_metrics):
+        value = values[metric_name]
         results["metrics"][metric_name] = value
         if value is not None:
             print(f"  {metric_name}: {value:.4f}")
@@ -157,8 +443,8 @@ def export_range_metrics(
     duration_minutes: int = 5
 ) -> Dict[str, List[tuple]]:
     """Export time series metrics for a duration."""
-    end = datetime.utcnow()
-    start = end - timedelta(minutes=duration_minutes)
+    end = time.time()
+    start = end - duration_minutes * 60
     
     results = {}
     for metric_name, query in queries.items():
@@ -170,9 +456,29 @@ def export_range_metrics(
     return results
 
 
+# Unit label -> keywords that identify it in a metric name, checked in order
+UNIT_KEYWORDS = {
+    "millicores": ("cpu", "millicores"),
+    "mb": ("memory", "mb"),
+    "percent": ("percent", "utilization"),
+    "seconds": ("latency", "duration"),
+}
+
+
+_KEYWORD_TO_UNIT = {k: unit for unit, keywords in UNIT_KEYWORDS.items() for k in keywords}
+_UNIT_PRIORITY = {unit: i for i, unit in enumerate(UNIT_KEYWORDS)}
+_UNIT_RE = re.compile("|".join(map(re.escape, _KEYWORD_TO_UNIT)), re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def classify_unit(metric_name: str) -> str:
+    """Infer the unit of a metric from its name."""
+    units = {_KEYWORD_TO_UNIT[match.lower()] for match in _UNIT_RE.findall(metric_name)}
+    return min(units, key=_UNIT_PRIORITY.__getitem__) if units else "value"
+
+
 def save_results(results: Dict[str, Any], output_dir: str, scheduler_name: str):
     """Save results to JSON and CSV files."""
-    import os
     os.makedirs(output_dir, exist_ok=True)
     
     # Save JSON
@@ -183,47 +489,77 @@ def save_results(results: Dict[str, Any], output_dir: str, scheduler_name: str):
     
     # Save CSV summary
     csv_path = os.path.join(output_dir, f"{scheduler_name}_metrics_summary.csv")
+    rows = [
+        (name, f"{value:.4f}" if value else "N/A", classify_unit(name))
+        for name, value in results.get("metrics", {}).items()
+        if value is not None
+    ]
     with open(csv_path, 'w', newline='') as f:
         writer = csv.writer(f)
         writer.writerow(["metric", "value", "unit"])
-        
-        metrics = results.get("metrics", {})
-        units = {
-            "millicores": ["cpu", "millicores"],
-            "mb": ["memory", "mb"],
-            "percent": ["percent", "utilization"],
-            "seconds": ["latency", "duration"],
-        }
-        
-        for metric_name, value in metrics.items():
-            if value is None:
-                continue
-            
-            # Determine unit
-            unit = "value"
-            metric_lower = metric_name.lower()
-            for u, keywords in units.items():
-                if any(k in metric_lower for k in keywords):
-                    unit = u
-                    break
-            
-            writer.writerow([metric_name, f"{value:.4f}" if value else "N/A", unit])
+        writer.writerows(rows)
     
     print(f"✅ Saved CSV: {csv_path}")
 
 
+def load_metrics_file(json_path: str) -> Optional[Dict[str, Any]]:
+    """Load an exported metrics JSON file, or None if it does not exist."""
+    try:
+        with open(json_path, 'rb') as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def comparison_rows_pandas(
+    all_metrics: Dict[str, Dict[str, Any]],
+    schedulers: List[str],
+    metric_names: List[str]
+) -> Optional[List[str]]:
+    """Build the comparison table rows from a metric x scheduler pivot.
+    
+    Returns None if pandas is not installed. It is imported here rather than at
+    module level so plain exports do not pay for it.
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        return None
+    
+    records = [
+        (scheduler, metric, value)
+        for scheduler, metrics in all_metrics.items()
+        for metric, value in metrics.items()
+    ]
+    if not records:
+        return []
+    table = (
+        pd.DataFrame.from_records(records, columns=["scheduler", "metric", "value"])
+        .pivot(index="metric", columns="scheduler", values="value")
+        .reindex(index=metric_names, columns=schedulers)
+    )
+    # Format the whole value matrix at once rather than cell by cell
+    values = table.to_numpy(dtype=float, na_value=np.nan)
+    cells = np.where(np.isnan(values), "N/A", np.char.mod("%.4f", values))
+    return [
+        "| " + " | ".join([metric, *row]) + " |"
+        for metric, row in zip(metric_names, cells.tolist())
+    ]
+
+
 def generate_comparison_table(data_dir: str, schedulers: List[str]) -> str:
     """Generate a markdown comparison table from exported metrics."""
-    import os
     
-    all_metrics = {}
+    paths = [os.path.join(data_dir, f"{scheduler}_metrics.json") for scheduler in schedulers]
+    with ThreadPoolExecutor(max_workers=FILE_WORKERS) as executor:
+        loaded = executor.map(load_metrics_file, paths)
     
-    for scheduler in schedulers:
-        json_path = os.path.join(data_dir, f"{scheduler}_metrics.json")
-        if os.path.exists(json_path):
-            with open(json_path, 'r') as f:
-                data = json.load(f)
-                all_metrics[scheduler] = data.get("metrics", {})
+    all_metrics = {
+        scheduler: data.get("metrics", {})
+        for scheduler, data in zip(schedulers, loaded)
+        if data is not None
+    }
     
     if not all_metrics:
         return "No metrics found."
@@ -237,6 +573,11 @@ def generate_comparison_table(data_dir: str, schedulers: List[str]) -> str:
     lines = ["| Metric | " + " | ".join(schedulers) + " |"]
     lines.append("|" + "---|" * (len(schedulers) + 1))
     
+    rows = comparison_rows_pandas(all_metrics, schedulers, sorted(metric_names))
+    if rows is not None:
+        lines.extend(rows)
+        return "\n".join(lines)
+    
     for metric in sorted(metric_names):
         row = [metric]
         for scheduler in schedulers:
@@ -257,6 +598,8 @@ def main():
     parser.add_argument("--output", type=str, default="data", help="Output directory")
     parser.add_argument("--duration", type=int, default=5, help="Range query duration in minutes")
     parser.add_argument("--compare", nargs="+", help="Generate comparison table for these schedulers")
+    parser.add_argument("--cache-ttl", type=float, default=15,
+                        help="Seconds to reuse cached query results (0 disables the cache)")
     
     args = parser.parse_args()
     
@@ -267,7 +610,6 @@ def main():
         print(table)
         
         # Save comparison
-        import os
         comparison_path = os.path.join(args.output, "scheduler_comparison.md")
         with open(comparison_path, 'w') as f:
             f.write("# Scheduler Comparison\n\n")
@@ -275,7 +617,8 @@ def main():
         print(f"\n✅ Saved comparison: {comparison_path}")
         return
     
-    client = PrometheusClient(args.prometheus)
+    cache = DiskCache(args.cache_ttl) if args.cache_ttl > 0 else None
+    client = PrometheusClient(args.prometheus, cache=cache)
     
     print(f"\n📡 Connecting to Prometheus: {args.prometheus}")
     print(f"📋 Scheduler: {args.scheduler}")
@@ -283,17 +626,19 @@ def main():
     
     # Determine which queries to use
     queries = METRICS_QUERIES.copy()
+    container_metrics = CONTAINER_METRICS.copy()
     
     if args.scheduler.lower() == "volcano":
-        queries.update(VOLCANO_QUERIES)
+        container_metrics.update(VOLCANO_CONTAINER_METRICS)
         print("Including Volcano-specific metrics")
     elif args.scheduler.lower() == "nexus":
         queries.update(NEXUS_QUERIES)
+        container_metrics.update(NEXUS_CONTAINER_METRICS)
         print("Including NEXUS-specific metrics")
     
     # Export metrics
     print("\n📊 Exporting instant metrics...")
-    results = export_instant_metrics(client, queries, args.scheduler)
+    results = export_instant_metrics(client, queries, args.scheduler, container_metrics)
     
     # Save results
     print("\n💾 Saving results...")
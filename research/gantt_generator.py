@@ -4,34 +4,66 @@ Gantt Chart Generator for Kubernetes Pod Scheduling
 ====================================================
 
 This script generates Gantt charts showing pod scheduling timeline.
-It extracts pod events from kubectl and visualizes the scheduling process.
+It extracts pod events from the cluster (via the Kubernetes Python client when
+installed, otherwise kubectl) and visualizes the scheduling process.
 
 Usage:
     python gantt_generator.py --events events.json --output gantt_chart.png
     
 Or collect events directly:
     python gantt_generator.py --collect --namespace default --output gantt_chart.png
+
+With pyarrow installed, parsed pods are saved next to the chart (gantt_chart.parquet)
+and the chart can be regenerated without re-parsing events:
+    python gantt_generator.py --from-parquet gantt_chart.parquet --output gantt_chart.png
 """
 
 import argparse
+import functools
+import itertools
 import json
+import os
+import re
 import subprocess
 import sys
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     import matplotlib.pyplot as plt
+    import numpy as np
     import matplotlib.patches as mpatches
+    from matplotlib.collections import PolyCollection
     from matplotlib.dates import DateFormatter, MinuteLocator
 except ImportError:
     print("ERROR: matplotlib is required. Install with: pip install matplotlib")
     sys.exit(1)
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_JSON_ERRORS = (ValueError, ijson.JSONError) if ijson else (ValueError,)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    from kubernetes import client as k8s_client, config as k8s_config
+except ImportError:
+    k8s_client = None
+
 
 class PodEvent:
     """Represents a pod scheduling event."""
     
+    __slots__ = ('name', 'namespace', 'created_at', 'scheduled_at', 'running_at', 'node', 'scheduler')
+    
     def __init__(self, name: str, namespace: str):
         self.name = name
         self.namespace = namespace
@@ -63,9 +95,45 @@ class PodEvent:
         return None
 
 
+# Phase timestamps (epoch seconds, NaN if unknown) plus the pod's index in the source list
+TIMELINE_DTYPE = np.dtype([
+    ('created', 'f8'),
+    ('scheduled', 'f8'),
+    ('running', 'f8'),
+    ('idx', 'i4'),
+])
+
+
+def build_timeline(pods: List[PodEvent]) -> np.ndarray:
+    """Pack pod phase timestamps into a structured array sorted by creation time."""
+    def epoch(dt: Optional[datetime]) -> float:
+        return dt.timestamp() if dt else np.nan
+    
+    timeline = np.array(
+        [(epoch(p.created_at), epoch(p.scheduled_at), epoch(p.running_at), i)
+         for i, p in enumerate(pods)],
+        dtype=TIMELINE_DTYPE
+    )
+    # idx breaks ties so the order matches a stable sort
+    return np.sort(timeline, order=['created', 'idx'])
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_k8s_timestamp(ts: str) -> datetime:
     """Parse Kubernetes timestamp to datetime."""
-    # Handle formats like: 2026-01-07T08:00:00Z
+    # Fast path for the common RFC 3339 form: 2026-01-07T08:00:00Z
+    if len(ts) == 20 and ts[19] == 'Z':
+        try:
+            return datetime(int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+                            int(ts[11:13]), int(ts[14:16]), int(ts[17:19]),
+                            tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    return _parse_k8s_timestamp_slow(ts)
+
+
+def _parse_k8s_timestamp_slow(ts: str) -> datetime:
+    """Parse timestamps with fractional seconds or explicit offsets."""
     if ts.endswith('Z'):
         ts = ts[:-1] + '+00:00'
     try:
@@ -74,34 +142,175 @@ def parse_k8s_timestamp(ts: str) -> datetime:
         return datetime.strptime(ts[:19], "%Y-%m-%dT%H:%M:%S")
 
 
-def collect_events_from_kubectl(namespace: str = "default") -> dict:
-    """Collect events directly from kubectl."""
-    cmd = ["kubectl", "get", "events", "-n", namespace, "--sort-by=.lastTimestamp", "-o", "json"]
+def _kubectl_events_cmd(namespace: str) -> List[str]:
+    return ["kubectl", "get", "events", "-n", namespace, "--sort-by=.lastTimestamp", "-o", "json"]
+
+
+def _kubectl_pods_cmd(namespace: str) -> List[str]:
+    return ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
+
+
+def _spawn(cmd: List[str]) -> subprocess.Popen:
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def collect_events_from_kubectl(
+    namespace: str = "default",
+    proc: Optional[subprocess.Popen] = None
+) -> Iterator[dict]:
+    """Stream events directly from kubectl, one event at a time.
+    
+    With ijson installed the kubectl output is parsed incrementally, so the
+    full event list is never held in memory. `proc` may be an already running
+    `kubectl get events` process.
+    """
+    proc = proc or _spawn(_kubectl_events_cmd(namespace))
+    parse_failed = False
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR: kubectl failed: {e.stderr}")
+        yield from _iter_items(proc.stdout)
+    except _JSON_ERRORS:
+        parse_failed = True
+    
+    stderr = proc.stderr.read().decode(errors="replace")
+    if proc.wait() != 0:
+        print(f"ERROR: kubectl failed: {stderr}")
         sys.exit(1)
-    except json.JSONDecodeError:
+    if parse_failed:
         print("ERROR: Failed to parse kubectl output as JSON")
         sys.exit(1)
 
 
-def collect_pods_from_kubectl(namespace: str = "default") -> dict:
-    """Collect pod info directly from kubectl."""
-    cmd = ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
+def collect_pods_from_kubectl(
+    namespace: str = "default",
+    proc: Optional[subprocess.Popen] = None
+) -> dict:
+    """Collect pod info directly from kubectl.
+    
+    `proc` may be an already running `kubectl get pods` process.
+    """
+    proc = proc or _spawn(_kubectl_pods_cmd(namespace))
+    stdout, stderr = proc.communicate()
+    if proc.returncode != 0:
+        print(f"ERROR: kubectl failed: {stderr.decode(errors='replace')}")
+        sys.exit(1)
+    return json.loads(stdout)
+
+
+def _core_v1_api():
+    """Return a CoreV1Api client, or None if the Kubernetes client is unavailable."""
+    if k8s_client is None:
+        return None
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(f"ERROR: kubectl failed: {e.stderr}")
+        k8s_config.load_kube_config()
+    except Exception:
+        try:
+            k8s_config.load_incluster_config()
+        except Exception:
+            return None
+    return k8s_client.CoreV1Api()
+
+
+def _iter_items(stream) -> Iterator[dict]:
+    """Yield the `items` of a Kubernetes list response read from a file-like stream."""
+    if ijson:
+        yield from ijson.items(stream, "items.item")
+    else:
+        yield from json.load(stream).get("items", [])
+
+
+def _list_pods(api, namespace: str) -> dict:
+    try:
+        response = api.list_namespaced_pod(namespace, _preload_content=False)
+    except Exception as e:  # ApiException, or urllib3 errors when the cluster is unreachable
+        print(f"ERROR: Listing pods failed: {getattr(e, 'reason', None) or e}")
+        sys.exit(1)
+    return json.loads(response.data)
+
+
+def _stream_events(api, namespace: str) -> Iterator[dict]:
+    """Yield pod events from a raw list response, parsed as it arrives."""
+    try:
+        response = api.list_namespaced_event(
+            namespace, field_selector="involvedObject.kind=Pod", _preload_content=False
+        )
+    except Exception as e:
+        print(f"ERROR: Listing events failed: {getattr(e, 'reason', None) or e}")
+        sys.exit(1)
+    try:
+        yield from _iter_items(response)
+    except _JSON_ERRORS:
+        print("ERROR: Failed to parse events response as JSON")
         sys.exit(1)
+    finally:
+        response.release_conn()
+
+
+def collect_cluster_state(namespace: str = "default") -> Tuple[dict, Iterator[dict]]:
+    """Collect pods and a stream of pod events from the cluster.
+    
+    Uses the Kubernetes Python client when available, otherwise kubectl. Both
+    listings are requested at the same time so their API round-trips overlap.
+    """
+    api = _core_v1_api()
+    if api is None:
+        events_proc = _spawn(_kubectl_events_cmd(namespace))
+        pods_proc = _spawn(_kubectl_pods_cmd(namespace))
+        try:
+            pods_data = collect_pods_from_kubectl(namespace, pods_proc)
+        except SystemExit:
+            # Don't leave the events listing running behind us
+            events_proc.terminate()
+            events_proc.wait()
+            raise
+        return pods_data, collect_events_from_kubectl(namespace, events_proc)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pods_future = executor.submit(_list_pods, api, namespace)
+        events = _stream_events(api, namespace)
+        first_event = next(events, None)  # issue the events request now
+        pods_data = pods_future.result()
+    return pods_data, itertools.chain([first_event] if first_event else [], events)
 
 
-def parse_events(events_data: dict, pods_data: Optional[dict] = None) -> Dict[str, PodEvent]:
-    """Parse Kubernetes events into PodEvent objects."""
+_NODE_RE = re.compile(r"\bto\s+(\S+)\s*$")
+
+
+def _on_scheduled(pod: PodEvent, timestamp: datetime, event: dict):
+    pod.scheduled_at = timestamp
+    # The node follows the final "to", e.g. "Successfully assigned default/web-1 to node-a";
+    # anchoring at the end keeps pod names such as "operator-to" from matching
+    match = _NODE_RE.search(event.get("message", ""))
+    if match:
+        pod.node = match.group(1)
+
+
+def _on_started(pod: PodEvent, timestamp: datetime, event: dict):
+    pod.running_at = timestamp
+
+
+def _on_successful_create(pod: PodEvent, timestamp: datetime, event: dict):
+    pod.created_at = timestamp
+
+
+# Event reason -> handler that records it on the pod
+_REASON_HANDLERS: Dict[str, Callable[[PodEvent, datetime, dict], None]] = {
+    "Scheduled": _on_scheduled,
+    "Started": _on_started,
+    "SuccessfulCreate": _on_successful_create,
+}
+
+
+def parse_events(events: Iterable[dict], pods_data: Optional[dict] = None) -> Dict[str, PodEvent]:
+    """Parse Kubernetes events into PodEvent objects.
+    
+    `events` may be any iterable of event objects, such as the stream from
+    collect_events_from_kubectl; it is consumed in a single pass. Where a pod
+    has several events with the same reason (e.g. one Started event per
+    container), the one with the latest lastTimestamp wins, whatever the order
+    of `events`.
+    """
     pods: Dict[str, PodEvent] = {}
+    latest: Dict[Tuple[str, str], str] = {}  # (pod, reason) -> lastTimestamp applied
     
     # First, get pod info if available
     if pods_data:
@@ -127,7 +336,7 @@ def parse_events(events_data: dict, pods_data: Optional[dict] = None) -> Dict[st
                         pods[name].running_at = parse_k8s_timestamp(condition["lastTransitionTime"])
     
     # Then parse events for scheduling info
-    for event in events_data.get("items", []):
+    for event in events:
         involved = event.get("involvedObject", {})
         if involved.get("kind") != "Pod":
             continue
@@ -135,34 +344,102 @@ def parse_events(events_data: dict, pods_data: Optional[dict] = None) -> Dict[st
         pod_name = involved.get("name", "")
         namespace = involved.get("namespace", "default")
         
-        if pod_name not in pods:
-            pods[pod_name] = PodEvent(pod_name, namespace)
+        pod = pods.get(pod_name)
+        if pod is None:
+            pod = pods[pod_name] = PodEvent(pod_name, namespace)
         
+        # Most events are irrelevant to scheduling; skip them before parsing timestamps
         reason = event.get("reason", "")
+        handler = _REASON_HANDLERS.get(reason)
+        if handler is None:
+            continue
+        # RFC 3339 timestamps in UTC compare correctly as strings; ties go to the later event
+        last_seen = event.get("lastTimestamp") or ""
+        if latest.get((pod_name, reason), "") > last_seen:
+            continue
+        latest[pod_name, reason] = last_seen
         timestamp = parse_k8s_timestamp(event.get("firstTimestamp") or event.get("eventTime", ""))
-        
-        if reason == "Scheduled":
-            pods[pod_name].scheduled_at = timestamp
-            # Extract node from message
-            message = event.get("message", "")
-            if "to" in message:
-                node = message.split("to")[-1].strip()
-                pods[pod_name].node = node
-        elif reason == "Started":
-            pods[pod_name].running_at = timestamp
-        elif reason == "SuccessfulCreate":
-            pods[pod_name].created_at = timestamp
+        handler(pod, timestamp, event)
     
     return pods
 
 
+def save_pods_parquet(pods: Dict[str, PodEvent], path: str):
+    """Write parsed pods to a Parquet file (requires pyarrow)."""
+    pod_list = list(pods.values())
+    timestamp = pa.timestamp('us', tz='UTC')
+    table = pa.table({
+        'name': pa.array([p.name for p in pod_list], pa.string()),
+        'namespace': pa.array([p.namespace for p in pod_list], pa.string()),
+        'created': pa.array([p.created_at for p in pod_list], timestamp),
+        'scheduled': pa.array([p.scheduled_at for p in pod_list], timestamp),
+        'running': pa.array([p.running_at for p in pod_list], timestamp),
+        'node': pa.array([p.node for p in pod_list], pa.string()),
+        'scheduler': pa.array([p.scheduler for p in pod_list], pa.string()),
+    })
+    pq.write_table(table, path, compression='zstd', compression_level=1)
+
+
+def load_pods_parquet(path: str) -> Dict[str, PodEvent]:
+    """Rebuild PodEvent objects from a file written by save_pods_parquet."""
+    if pa is None:
+        print("ERROR: pyarrow is required to read Parquet. Install with: pip install pyarrow")
+        sys.exit(1)
+    
+    columns = pq.read_table(path).to_pydict()
+    pods: Dict[str, PodEvent] = {}
+    for i, name in enumerate(columns['name']):
+        pod = pods[name] = PodEvent(name, columns['namespace'][i])
+        pod.created_at = columns['created'][i]
+        pod.scheduled_at = columns['scheduled'][i]
+        pod.running_at = columns['running'][i]
+        pod.node = columns['node'][i]
+        pod.scheduler = columns['scheduler'][i]
+    return pods
+
+
+def summarize_durations(durations: np.ndarray) -> Dict[str, Optional[float]]:
+    """Min/max/mean of durations in seconds, ignoring NaN entries for missing phases."""
+    if np.isnan(durations).all():
+        return {"min": None, "max": None, "avg": None}
+    return {
+        "min": float(np.nanmin(durations)),
+        "max": float(np.nanmax(durations)),
+        "avg": float(np.nanmean(durations)),
+    }
+
+
+def phase_bars(
+    y: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    height: float,
+    color: str
+) -> PolyCollection:
+    """Build one phase's horizontal bars as a single collection."""
+    top, bottom = y + height / 2, y - height / 2
+    verts = np.stack([
+        np.column_stack([start, bottom]),
+        np.column_stack([start, top]),
+        np.column_stack([end, top]),
+        np.column_stack([end, bottom]),
+    ], axis=1)
+    return PolyCollection(verts, facecolors=color, edgecolors='black', linewidths=0.5)
+
+
 def generate_gantt_chart(
     pods: Dict[str, PodEvent],
     output_path: str,
     title: str = "Pod Scheduling Timeline",
-    scheduler_name: str = ""
+    scheduler_name: str = "",
+    dpi: int = 100,
+    image_format: Optional[str] = None
 ):
-    """Generate a Gantt chart visualization."""
+    """Generate a Gantt chart visualization.
+    
+    The chart is written at `dpi` in `image_format`, or in the format implied by
+    `output_path`'s extension when no format is given.
+    """
     
     # Filter pods with valid timeline data
     valid_pods = [p for p in pods.values() if p.created_at and (p.scheduled_at or p.running_at)]
@@ -172,7 +449,8 @@ def generate_gantt_chart(
         return
     
     # Sort by creation time
-    valid_pods.sort(key=lambda p: p.created_at)
+    timeline = build_timeline(valid_pods)
+    valid_pods = [valid_pods[i] for i in timeline['idx']]
     
     # Create figure
     fig, ax = plt.subplots(figsize=(14, max(6, len(valid_pods) * 0.4)))
@@ -185,42 +463,43 @@ def generate_gantt_chart(
         'running': '#228B22',      # Forest Green - running
     }
     
-    # Find time range
-    min_time = min(p.created_at for p in valid_pods)
-    max_time = max(p.running_at or p.scheduled_at or p.created_at for p in valid_pods)
-    
-    # Plot each pod
-    y_positions = []
-    y_labels = []
-    
-    for i, pod in enumerate(valid_pods):
-        y = len(valid_pods) - i - 1
-        y_positions.append(y)
-        
-        # Truncate pod name for label
-        label = pod.name[:30] + "..." if len(pod.name) > 30 else pod.name
-        y_labels.append(label)
-        
-        bar_height = 0.6
-        
-        # Phase 1: Pending (created -> scheduled)
-        if pod.created_at and pod.scheduled_at:
-            duration = (pod.scheduled_at - pod.created_at).total_seconds()
-            ax.barh(y, duration, left=(pod.created_at - min_time).total_seconds(),
-                   height=bar_height, color=colors['pending'], edgecolor='black', linewidth=0.5)
-        
-        # Phase 2: Starting (scheduled -> running)
-        if pod.scheduled_at and pod.running_at:
-            duration = (pod.running_at - pod.scheduled_at).total_seconds()
-            ax.barh(y, duration, left=(pod.scheduled_at - min_time).total_seconds(),
-                   height=bar_height, color=colors['starting'], edgecolor='black', linewidth=0.5)
-        
-        # Add node annotation
-        if pod.node:
-            node_short = pod.node.split(".")[0][-12:]  # Last 12 chars of hostname
-            text_x = (pod.running_at or pod.scheduled_at or pod.created_at) - min_time
-            ax.annotate(node_short, xy=(text_x.total_seconds() + 1, y),
-                       fontsize=7, va='center', alpha=0.7)
+    # Phase boundaries in seconds from the first pod creation (NaN if unknown)
+    origin = timeline['created'][0]
+    created_s = timeline['created'] - origin
+    scheduled_s = timeline['scheduled'] - origin
+    running_s = timeline['running'] - origin
+    y_positions = np.arange(len(valid_pods) - 1, -1, -1)
+    bar_height = 0.6
+    
+    # Phase 1: Pending (created -> scheduled)
+    has_pending = ~np.isnan(scheduled_s)
+    ax.add_collection(phase_bars(
+        y_positions[has_pending], created_s[has_pending], scheduled_s[has_pending],
+        bar_height, colors['pending']
+    ))
+    
+    # Phase 2: Starting (scheduled -> running)
+    has_starting = has_pending & ~np.isnan(running_s)
+    ax.add_collection(phase_bars(
+        y_positions[has_starting], scheduled_s[has_starting], running_s[has_starting],
+        bar_height, colors['starting']
+    ))
+    ax.autoscale_view()
+    ax.set_xlim(left=0)
+    
+    # Truncate pod names for labels
+    y_labels = [p.name[:30] + "..." if len(p.name) > 30 else p.name for p in valid_pods]
+    
+    # Add node annotations just after each pod's last known phase
+    text_x = np.where(~np.isnan(running_s), running_s,
+                      np.where(~np.isnan(scheduled_s), scheduled_s, created_s)) + 1
+    node_labels = [p.node.split(".")[0][-12:] if p.node else None  # Last 12 chars of hostname
+                   for p in valid_pods]
+    # Like ax.annotate's annotation_clip, skip labels anchored past the x-limit
+    x_right = ax.get_xlim()[1]
+    for x, y, label in zip(text_x, y_positions, node_labels):
+        if label and x <= x_right:
+            ax.text(x, y, label, fontsize=7, va='center', alpha=0.7)
     
     # Customize axes
     ax.set_yticks(y_positions)
@@ -245,77 +524,86 @@ def generate_gantt_chart(
     ax.grid(axis='x', linestyle='--', alpha=0.3)
     ax.set_axisbelow(True)
     
-    # Adjust layout
-    plt.tight_layout()
+    # Adjust layout with fixed margins (in inches) rather than a tight bbox,
+    # which would need an extra render pass to measure
+    fig_width, fig_height = fig.get_size_inches()
+    fig.subplots_adjust(left=2.6 / fig_width, right=1 - 0.9 / fig_width,
+                        bottom=0.7 / fig_height, top=1 - 0.5 / fig_height)
     
     # Save
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    image_format = image_format or os.path.splitext(output_path)[1][1:].lower() or 'png'
+    # pil_kwargs only applies to raster formats written through Pillow
+    save_kwargs = {'pil_kwargs': {'optimize': True}} if image_format == 'png' else {}
+    fig.savefig(output_path, dpi=dpi, format=image_format, **save_kwargs)
     print(f"✅ Gantt chart saved to: {output_path}")
     
     # Print statistics
     print("\n📊 Scheduling Statistics:")
     print("-" * 50)
     
-    scheduling_times = [p.scheduling_duration for p in valid_pods if p.scheduling_duration is not None]
-    startup_times = [p.startup_duration for p in valid_pods if p.startup_duration is not None]
-    total_times = [p.total_duration for p in valid_pods if p.total_duration is not None]
-    
-    if scheduling_times:
-        print(f"Scheduling Latency (creation → scheduled):")
-        print(f"  Min: {min(scheduling_times):.2f}s | Max: {max(scheduling_times):.2f}s | Avg: {sum(scheduling_times)/len(scheduling_times):.2f}s")
-    
-    if startup_times:
-        print(f"Container Startup (scheduled → running):")
-        print(f"  Min: {min(startup_times):.2f}s | Max: {max(startup_times):.2f}s | Avg: {sum(startup_times)/len(startup_times):.2f}s")
+    # Phase durations per pod, NaN where a phase is missing
+    stats = {
+        "scheduling_latency": summarize_durations(timeline['scheduled'] - timeline['created']),
+        "startup_time": summarize_durations(timeline['running'] - timeline['scheduled']),
+        "total_time": summarize_durations(timeline['running'] - timeline['created']),
+    }
     
-    if total_times:
-        print(f"Total Pod Startup (creation → running):")
-        print(f"  Min: {min(total_times):.2f}s | Max: {max(total_times):.2f}s | Avg: {sum(total_times)/len(total_times):.2f}s")
+    for key, heading in (
+        ("scheduling_latency", "Scheduling Latency (creation → scheduled):"),
+        ("startup_time", "Container Startup (scheduled → running):"),
+        ("total_time", "Total Pod Startup (creation → running):"),
+    ):
+        summary = stats[key]
+        if summary["min"] is not None:
+            print(heading)
+            print(f"  Min: {summary['min']:.2f}s | Max: {summary['max']:.2f}s | Avg: {summary['avg']:.2f}s")
     
     print(f"\nTotal pods analyzed: {len(valid_pods)}")
     
     # Return statistics for programmatic use
-    return {
-        "pod_count": len(valid_pods),
-        "scheduling_latency": {
-            "min": min(scheduling_times) if scheduling_times else None,
-            "max": max(scheduling_times) if scheduling_times else None,
-            "avg": sum(scheduling_times)/len(scheduling_times) if scheduling_times else None,
-        },
-        "startup_time": {
-            "min": min(startup_times) if startup_times else None,
-            "max": max(startup_times) if startup_times else None,
-            "avg": sum(startup_times)/len(startup_times) if startup_times else None,
-        },
-        "total_time": {
-            "min": min(total_times) if total_times else None,
-            "max": max(total_times) if total_times else None,
-            "avg": sum(total_times)/len(total_times) if total_times else None,
-        }
-    }
+    return {"pod_count": len(valid_pods), **stats}
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate Gantt charts for Kubernetes pod scheduling")
     parser.add_argument("--events", type=str, help="Path to events.json file")
     parser.add_argument("--pods", type=str, help="Path to pods.json file (optional)")
-    parser.add_argument("--collect", action="store_true", help="Collect events directly from kubectl")
+    parser.add_argument("--collect", action="store_true", help="Collect events directly from the cluster (Kubernetes client or kubectl)")
     parser.add_argument("--namespace", type=str, default="default", help="Kubernetes namespace")
     parser.add_argument("--output", type=str, default="gantt_chart.png", help="Output file path")
     parser.add_argument("--title", type=str, default="Pod Scheduling Timeline", help="Chart title")
     parser.add_argument("--scheduler", type=str, default="", help="Scheduler name for title")
+    parser.add_argument("--dpi", type=int, default=100, help="Output image resolution")
+    parser.add_argument("--format", type=str, choices=["png", "webp"],
+                        help="Output image format; replaces a .png/.webp --output extension "
+                             "(default: from --output's extension)")
+    parser.add_argument("--from-parquet", type=str,
+                        help="Load parsed pods from a .parquet file saved by a previous run")
     
     args = parser.parse_args()
     
+    # Keep the file extension and an explicit --format in agreement
+    output_root, output_ext = os.path.splitext(args.output)
+    if args.format is not None and output_ext.lower() != f".{args.format}":
+        if output_ext and output_ext.lower() not in (".png", ".webp"):
+            parser.error(f"--format {args.format} conflicts with --output extension {output_ext}")
+        args.output = f"{output_root}.{args.format}"
+    
+    if args.from_parquet:
+        print(f"📂 Loading parsed pods from: {args.from_parquet}")
+        pods = load_pods_parquet(args.from_parquet)
+        print(f"📋 Found {len(pods)} pods")
+        generate_gantt_chart(pods, args.output, args.title, args.scheduler, args.dpi, args.format)
+        return
+    
     # Collect or load events
     if args.collect:
         print(f"📡 Collecting events from namespace: {args.namespace}")
-        events_data = collect_events_from_kubectl(args.namespace)
-        pods_data = collect_pods_from_kubectl(args.namespace)
+        pods_data, events = collect_cluster_state(args.namespace)
     elif args.events:
         print(f"📂 Loading events from: {args.events}")
         with open(args.events, 'r') as f:
-            events_data = json.load(f)
+            events = json.load(f).get("items", [])
         pods_data = None
         if args.pods:
             with open(args.pods, 'r') as f:
@@ -326,11 +614,17 @@ def main():
         sys.exit(1)
     
     # Parse events
-    pods = parse_events(events_data, pods_data)
+    pods = parse_events(events, pods_data)
     print(f"📋 Found {len(pods)} pods")
     
+    # Keep the parsed pods so the chart can be regenerated with --from-parquet
+    if pa is not None:
+        parquet_path = output_root + ".parquet"
+        save_pods_parquet(pods, parquet_path)
+        print(f"💾 Parsed pods saved to: {parquet_path}")
+    
     # Generate chart
-    generate_gantt_chart(pods, args.output, args.title, args.scheduler)
+    generate_gantt_chart(pods, args.output, args.title, args.scheduler, args.dpi, args.format)
 
 
 if __name__ == "__main__":
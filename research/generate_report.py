@@ -10,58 +10,321 @@ Usage:
     python generate_report.py --data-dir data/ --output report.md
 """
 
-import argparse
-import json
+import io
 import os
-import glob
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+# Result key -> (Locust CSV column, type) for the 'Aggregated' row
+LOCUST_COLUMNS = {
+    'total_requests': ('Request Count', int),
+    'failures': ('Failure Count', int),
+    'median_response_time': ('Median Response Time', float),
+    'avg_response_time': ('Average Response Time', float),
+    'min_response_time': ('Min Response Time', float),
+    'max_response_time': ('Max Response Time', float),
+    'p50': ('50%', float),
+    'p95': ('95%', float),
+    'p99': ('99%', float),
+    'rps': ('Requests/s', float),
+}
+
+
+def _read_last_line(f, start: int) -> bytes:
+    """Return the last non-empty line of a binary file after `start`, reading backwards."""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    tail = b""
+    while pos > start:
+        step = min(4096, pos - start)
+        pos -= step
+        f.seek(pos)
+        tail = f.read(step) + tail
+        stripped = tail.rstrip(b"\r\n")
+        if b"\n" in stripped:
+            return stripped.rsplit(b"\n", 1)[1]
+    return tail.rstrip(b"\r\n")
 
 
 def load_locust_data(csv_path: str) -> Dict[str, Any]:
     """Load and parse Locust CSV results."""
     import csv
     
-    if not os.path.exists(csv_path):
+    try:
+        f = open(csv_path, 'rb', buffering=1 << 20)
+    except FileNotFoundError:
         return {}
     
-    results = {}
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row.get('Name') == 'Aggregated':
-                results = {
-                    'total_requests': int(row.get('Request Count', 0)),
-                    'failures': int(row.get('Failure Count', 0)),
-                    'median_response_time': float(row.get('Median Response Time', 0)),
-                    'avg_response_time': float(row.get('Average Response Time', 0)),
-                    'min_response_time': float(row.get('Min Response Time', 0)),
-                    'max_response_time': float(row.get('Max Response Time', 0)),
-                    'p50': float(row.get('50%', 0)),
-                    'p95': float(row.get('95%', 0)),
-                    'p99': float(row.get('99%', 0)),
-                    'rps': float(row.get('Requests/s', 0)),
-                }
-    return results
-
-
-def load_metrics_data(json_path: str) -> Dict[str, Any]:
-    """Load Prometheus metrics from JSON."""
-    if not os.path.exists(json_path):
+    with f:
+        header = next(csv.reader([f.readline().decode('utf-8')]), None)
+        if not header or 'Name' not in header:
+            return {}
+        columns = {name: i for i, name in enumerate(header)}
+        name_idx = columns['Name']
+        body_start = f.tell()
+        
+        def is_aggregated(row: Optional[List[str]]) -> bool:
+            return bool(row) and len(row) > name_idx and row[name_idx] == 'Aggregated'
+        
+        # Locust writes the 'Aggregated' row last, so try the final line first
+        row = next(csv.reader([_read_last_line(f, body_start).decode('utf-8')]), None)
+        if not is_aggregated(row):
+            f.seek(body_start)
+            rows = csv.reader(io.TextIOWrapper(f, encoding='utf-8', newline=''))
+            row = next((r for r in rows if is_aggregated(r)), None)
+        if row is None:
+            return {}
+        
+        return {
+            key: convert(row[columns[column]]) if column in columns else convert(0)
+            for key, (column, convert) in LOCUST_COLUMNS.items()
+        }
+
+
+def load_metrics_data(json_path: str) -> Any:
+    """Load Prometheus metrics from JSON, as a Metrics struct when msgspec is available."""
+    try:
+        with open(json_path, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
         return {}
-    
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-    return data.get('metrics', {})
+    if msgspec is not None:
+        try:
+            return _metrics_decoder.decode(raw).metrics
+        except msgspec.DecodeError:
+            pass  # Unexpected value types; fall back to a plain dict
+    return json_loads(raw).get('metrics', {})
+
+
+def metric_getter(metrics: Any) -> Callable[[str], Any]:
+    """Return a key -> value lookup for a Metrics struct or a plain dict."""
+    if isinstance(metrics, dict):
+        return metrics.get
+    return lambda key: getattr(metrics, key)
 
 
 def load_gantt_stats(json_path: str) -> Dict[str, Any]:
     """Load Gantt chart statistics."""
-    if not os.path.exists(json_path):
+    try:
+        with open(json_path, 'rb') as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
         return {}
+
+
+# Bump when a parser's output changes in a way _CACHE_SCHEMA does not capture
+CACHE_VERSION = 1
+
+
+def _cached_load(path: str, parser):
+    """Parse `path` with `parser`, reusing a pickle sidecar while the file is unchanged.
+    
+    The sidecar (`<path>.cache.pkl`) is keyed by the source's mtime and size, so
+    editing or replacing the source invalidates it without any TTL. The key also
+    carries the cache format version, the parser and the parsed schema, so output
+    from an older parser is never served.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return parser(path)
+    key = (CACHE_VERSION, parser.__name__, _CACHE_SCHEMA, st.st_mtime_ns, st.st_size)
+    cache_path = path + ".cache.pkl"
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, value = pickle.load(f)
+        if cached_key == key:
+            return value
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError, ImportError):
+        pass
+    
+    value = parser(path)
+    
+    # Write to a temp file and rename so a concurrent reader never sees a partial cache
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass  # Read-only data directory; just skip caching
+    return value
+
+
+def fmt_cell(value: Any, unit: str = '', spec: str = '.2f') -> str:
+    """Format a table cell, or N/A for missing values."""
+    if value is None:
+        return "N/A"
+    return format(value, spec) + unit
+
+
+def failure_rate(locust: Dict[str, Any]) -> Optional[float]:
+    """Failed requests as a percentage of all requests."""
+    total = locust.get('total_requests', 0)
+    if total > 0:
+        return (locust.get('failures', 0) / total) * 100
+    return None
+
+
+def scan_scheduler_dir(data_dir: str, scheduler: str) -> Optional[Dict[str, os.DirEntry]]:
+    """List a scheduler's data directory in one pass, or None if it does not exist.
+    
+    Looks for `<scheduler>_scheduler/` first, then `<scheduler>/`.
+    """
+    for dirname in (f"{scheduler}_scheduler", scheduler):
+        try:
+            with os.scandir(os.path.join(data_dir, dirname)) as it:
+                return {entry.name: entry for entry in it}
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return None
+
+
+def load_scheduler_data(data_dir: str, scheduler: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Load a scheduler's Locust and metrics data, or None if it has no data directory."""
+    entries = scan_scheduler_dir(data_dir, scheduler)
+    if entries is None:
+        return None
     
-    with open(json_path, 'r') as f:
-        return json.load(f)
+    # Find Locust CSV (first match in directory order, as glob returned it)
+    locust_path = next((e.path for e in entries.values() if e.name.endswith("_stats.csv")), None)
+    locust_data = _cached_load(locust_path, load_locust_data) if locust_path else {}
+    
+    # Find metrics JSON
+    metrics_name = next(
+        (name for name in (f"{scheduler}_metrics.json", "metrics.json") if name in entries), None
+    )
+    metrics_data = _cached_load(entries[metrics_name].path, load_metrics_data) if metrics_name else {}
+    
+    return {
+        'locust': locust_data,
+        'metrics': metrics_data,
+    }
+
+
+# Locust table rows: (label, key, unit, format spec); counts are ints and print without decimals
+LOCUST_METRICS = [
+    ('Total Requests', 'total_requests', '', ''),
+    ('Failures', 'failures', '', ''),
+    ('Failure Rate', 'failure_rate', '%', '.2f'),  # Calculated
+    ('Median Response Time', 'median_response_time', 'ms', '.2f'),
+    ('p95 Response Time', 'p95', 'ms', '.2f'),
+    ('p99 Response Time', 'p99', 'ms', '.2f'),
+    ('Requests/sec', 'rps', '', '.2f'),
+]
+
+# Control-plane overhead rows: (component, key, metric label)
+OVERHEAD_METRICS = [
+    ('Scheduler', 'scheduler_cpu_usage_millicores', 'CPU (millicores)'),
+    ('Scheduler', 'scheduler_memory_mb', 'Memory (MB)'),
+    ('API Server', 'apiserver_request_rate', 'Requests/sec'),
+    ('API Server', 'apiserver_cpu_usage_millicores', 'CPU (millicores)'),
+    ('etcd', 'etcd_request_rate', 'Requests/sec'),
+]
+
+# Scheduling performance rows: (label, key, unit)
+SCHEDULING_METRICS = [
+    ('Scheduling Latency (p99)', 'scheduler_scheduling_latency_p99', 's'),
+    ('Scheduling Latency (p50)', 'scheduler_scheduling_latency_p50', 's'),
+    ('Pending Pods', 'scheduler_pending_pods', ''),
+]
+
+if msgspec is not None:
+    # One optional field per metric the tables read; other exported keys are ignored
+    Metrics = msgspec.defstruct(
+        'Metrics',
+        [(key, Optional[float], None) for _, key, _ in (*OVERHEAD_METRICS, *SCHEDULING_METRICS)],
+        module=__name__,
+    )
+
+    class MetricsFile(msgspec.Struct):
+        metrics: Metrics = msgspec.field(default_factory=Metrics)
+
+    _metrics_decoder = msgspec.json.Decoder(MetricsFile)
+
+# Parsed shapes that cached results depend on: Locust keys and, with msgspec, the Metrics fields
+_CACHE_SCHEMA = (
+    tuple(LOCUST_COLUMNS),
+    Metrics.__struct_fields__ if msgspec is not None else None,
+)
+
+_LOCUST_INTRO_MD = """\
+## 1. Application Performance
+
+Metrics from Locust load testing (100 concurrent users, 5-minute test).
+
+"""
+
+_OVERHEAD_INTRO_MD = """\
+## 2. Control-Plane Overhead
+
+Resource utilization of scheduler and control-plane components.
+
+"""
+
+_SCHEDULING_INTRO_MD = """\
+## 3. Scheduling Performance
+
+Scheduler-specific metrics.
+
+"""
+
+_FINDINGS_MD = """\
+## 4. Key Findings
+
+### Observations
+
+1. **Scheduling Overhead**: [To be filled based on data]
+2. **Application Impact**: [To be filled based on data]
+3. **Gang Scheduling Effect**: [To be filled based on data]
+
+"""
+
+_RECOMMENDATIONS_MD = """\
+## 5. Recommendations
+
+Based on the experimental results:
+
+- For **steady-state workloads**: [Recommendation]
+- For **flash-sale spikes**: [Recommendation]
+- For **batch/ML workloads**: [Recommendation]
+
+"""
+
+_APPENDIX_MD = """\
+## Appendix
+
+### Test Configuration
+
+| Parameter | Value |
+|-----------|-------|
+| Cluster Size | 4 nodes (t3.small) |
+| Instance Type | AWS Spot |
+| Kubernetes Version | 1.29 |
+| Test Duration | 5 minutes |
+| Concurrent Users | 100 |
+"""
 
 
 def generate_report(
@@ -71,187 +334,88 @@ def generate_report(
 ):
     """Generate the comprehensive comparison report."""
     
-    report = []
-    report.append("# Kubernetes Scheduler Comparison Report")
-    report.append("")
-    report.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report.append("")
+    # Load data for each scheduler; directories are independent, so read them concurrently
+    with ThreadPoolExecutor(max_workers=max(1, len(schedulers))) as executor:
+        loaded = list(executor.map(lambda s: load_scheduler_data(data_dir, s), schedulers))
     
-    # Load data for each scheduler
     all_data = {}
-    for scheduler in schedulers:
-        scheduler_dir = os.path.join(data_dir, f"{scheduler}_scheduler")
-        if not os.path.exists(scheduler_dir):
-            scheduler_dir = os.path.join(data_dir, scheduler)
-        
-        if not os.path.exists(scheduler_dir):
+    for scheduler, data in zip(schedulers, loaded):
+        if data is None:
             print(f"Warning: No data directory found for {scheduler}")
             continue
-        
-        # Find Locust CSV
-        locust_files = glob.glob(os.path.join(scheduler_dir, "*_stats.csv"))
-        locust_data = load_locust_data(locust_files[0]) if locust_files else {}
-        
-        # Find metrics JSON
-        metrics_file = os.path.join(scheduler_dir, f"{scheduler}_metrics.json")
-        if not os.path.exists(metrics_file):
-            metrics_file = os.path.join(scheduler_dir, "metrics.json")
-        metrics_data = load_metrics_data(metrics_file)
-        
-        all_data[scheduler] = {
-            'locust': locust_data,
-            'metrics': metrics_data,
-        }
-    
-    # Section 1: Executive Summary
-    report.append("## Executive Summary")
-    report.append("")
-    report.append("This report compares the performance and overhead of different Kubernetes schedulers")
-    report.append(f"under flash-sale traffic conditions. Schedulers tested: **{', '.join(schedulers)}**")
-    report.append("")
-    
-    # Section 2: Application Performance (Locust)
-    report.append("## 1. Application Performance")
-    report.append("")
-    report.append("Metrics from Locust load testing (100 concurrent users, 5-minute test).")
-    report.append("")
-    
-    # Build comparison table
-    report.append("| Metric | " + " | ".join(schedulers) + " |")
-    report.append("|" + "---|" * (len(schedulers) + 1))
+        all_data[scheduler] = data
     
-    locust_metrics = [
-        ('Total Requests', 'total_requests', ''),
-        ('Failures', 'failures', ''),
-        ('Failure Rate', None, '%'),  # Calculated
-        ('Median Response Time', 'median_response_time', 'ms'),
-        ('p95 Response Time', 'p95', 'ms'),
-        ('p99 Response Time', 'p99', 'ms'),
-        ('Requests/sec', 'rps', ''),
-    ]
+    # Each scheduler's section dicts, fetched once per table rather than per cell
+    locust_dicts = [all_data.get(s, {}).get('locust', {}) for s in schedulers]
+    locust_dicts = [{**d, 'failure_rate': failure_rate(d)} for d in locust_dicts]
+    metrics_getters = [metric_getter(all_data.get(s, {}).get('metrics', {})) for s in schedulers]
     
-    for label, key, unit in locust_metrics:
-        row = [label]
-        for scheduler in schedulers:
-            data = all_data.get(scheduler, {}).get('locust', {})
-            if key:
-                value = data.get(key)
-                if value is not None:
-                    row.append(f"{value:.2f}{unit}" if isinstance(value, float) else f"{value}{unit}")
-                else:
-                    row.append("N/A")
-            elif label == 'Failure Rate':
-                total = data.get('total_requests', 0)
-                failures = data.get('failures', 0)
-                if total > 0:
-                    rate = (failures / total) * 100
-                    row.append(f"{rate:.2f}%")
-                else:
-                    row.append("N/A")
-        report.append("| " + " | ".join(row) + " |")
+    # Row templates and headers shared by the sections
+    metric_row = "| " + " | ".join(["{}"] * (len(schedulers) + 1)) + " |"
+    overhead_row = "| " + " | ".join(["{}"] * (len(schedulers) + 2)) + " |"
+    metric_header = metric_row.format("Metric", *schedulers)
+    sep1 = "|" + "---|" * (len(schedulers) + 1)
+    sep2 = "|" + "---|" * (len(schedulers) + 2)
     
-    report.append("")
+    # Section 2: Application Performance (Locust)
+    locust_rows = [metric_header, sep1, *[
+        metric_row.format(label, *[fmt_cell(d.get(key), unit, spec) for d in locust_dicts])
+        for label, key, unit, spec in LOCUST_METRICS
+    ]]
     
     # Section 3: Control-Plane Overhead
-    report.append("## 2. Control-Plane Overhead")
-    report.append("")
-    report.append("Resource utilization of scheduler and control-plane components.")
-    report.append("")
-    
-    report.append("| Component | Metric | " + " | ".join(schedulers) + " |")
-    report.append("|" + "---|" * (len(schedulers) + 2))
-    
-    overhead_metrics = [
-        ('Scheduler', 'scheduler_cpu_usage_millicores', 'CPU (millicores)'),
-        ('Scheduler', 'scheduler_memory_mb', 'Memory (MB)'),
-        ('API Server', 'apiserver_request_rate', 'Requests/sec'),
-        ('API Server', 'apiserver_cpu_usage_millicores', 'CPU (millicores)'),
-        ('etcd', 'etcd_request_rate', 'Requests/sec'),
-    ]
-    
-    for component, key, metric_label in overhead_metrics:
-        row = [component, metric_label]
-        for scheduler in schedulers:
-            data = all_data.get(scheduler, {}).get('metrics', {})
-            value = data.get(key)
-            if value is not None:
-                row.append(f"{value:.2f}")
-            else:
-                row.append("N/A")
-        report.append("| " + " | ".join(row) + " |")
-    
-    report.append("")
+    overhead_rows = [overhead_row.format("Component", "Metric", *schedulers), sep2, *[
+        overhead_row.format(component, metric_label, *[fmt_cell(get(key)) for get in metrics_getters])
+        for component, key, metric_label in OVERHEAD_METRICS
+    ]]
     
     # Section 4: Scheduling Performance
-    report.append("## 3. Scheduling Performance")
-    report.append("")
-    report.append("Scheduler-specific metrics.")
-    report.append("")
-    
-    report.append("| Metric | " + " | ".join(schedulers) + " |")
-    report.append("|" + "---|" * (len(schedulers) + 1))
+    scheduling_rows = [metric_header, sep1, *[
+        metric_row.format(label, *[fmt_cell(get(key), unit, '.4f') for get in metrics_getters])
+        for label, key, unit in SCHEDULING_METRICS
+    ]]
     
-    scheduling_metrics = [
-        ('Scheduling Latency (p99)', 'scheduler_scheduling_latency_p99', 's'),
-        ('Scheduling Latency (p50)', 'scheduler_scheduling_latency_p50', 's'),
-        ('Pending Pods', 'scheduler_pending_pods', ''),
-    ]
-    
-    for label, key, unit in scheduling_metrics:
-        row = [label]
-        for scheduler in schedulers:
-            data = all_data.get(scheduler, {}).get('metrics', {})
-            value = data.get(key)
-            if value is not None:
-                row.append(f"{value:.4f}{unit}")
-            else:
-                row.append("N/A")
-        report.append("| " + " | ".join(row) + " |")
-    
-    report.append("")
-    
-    # Section 5: Key Findings
-    report.append("## 4. Key Findings")
-    report.append("")
-    report.append("### Observations")
-    report.append("")
-    report.append("1. **Scheduling Overhead**: [To be filled based on data]")
-    report.append("2. **Application Impact**: [To be filled based on data]")
-    report.append("3. **Gang Scheduling Effect**: [To be filled based on data]")
-    report.append("")
-    
-    # Section 6: Recommendations
-    report.append("## 5. Recommendations")
-    report.append("")
-    report.append("Based on the experimental results:")
-    report.append("")
-    report.append("- For **steady-state workloads**: [Recommendation]")
-    report.append("- For **flash-sale spikes**: [Recommendation]")
-    report.append("- For **batch/ML workloads**: [Recommendation]")
-    report.append("")
-    
-    # Section 7: Appendix
-    report.append("## Appendix")
-    report.append("")
-    report.append("### Test Configuration")
-    report.append("")
-    report.append("| Parameter | Value |")
-    report.append("|-----------|-------|")
-    report.append("| Cluster Size | 4 nodes (t3.small) |")
-    report.append("| Instance Type | AWS Spot |")
-    report.append("| Kubernetes Version | 1.29 |")
-    report.append("| Test Duration | 5 minutes |")
-    report.append("| Concurrent Users | 100 |")
-    report.append("")
-    
-    # Write report
-    with open(output_path, 'w') as f:
-        f.write('\n'.join(report))
+    # Write report section by section
+    with open(output_path, 'w', buffering=1 << 16) as f:
+        f.write(
+            "# Kubernetes Scheduler Comparison Report\n"
+            "\n"
+            f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            "\n"
+        )
+        
+        # Section 1: Executive Summary
+        f.write(
+            "## Executive Summary\n"
+            "\n"
+            "This report compares the performance and overhead of different Kubernetes schedulers\n"
+            f"under flash-sale traffic conditions. Schedulers tested: **{', '.join(schedulers)}**\n"
+            "\n"
+        )
+        
+        f.write(_LOCUST_INTRO_MD)
+        f.write("\n".join(locust_rows))
+        f.write("\n\n")
+        
+        f.write(_OVERHEAD_INTRO_MD)
+        f.write("\n".join(overhead_rows))
+        f.write("\n\n")
+        
+        f.write(_SCHEDULING_INTRO_MD)
+        f.write("\n".join(scheduling_rows))
+        f.write("\n\n")
+        
+        # Sections 5-7: Key Findings, Recommendations, Appendix
+        f.write(_FINDINGS_MD)
+        f.write(_RECOMMENDATIONS_MD)
+        f.write(_APPENDIX_MD)
     
     print(f"✅ Report generated: {output_path}")
 
 
 def main():
+    import argparse
+    
     parser = argparse.ArgumentParser(description="Generate scheduler comparison report")
     parser.add_argument("--data-dir", type=str, default="data", help="Directory containing scheduler data")
     parser.add_argument("--schedulers", nargs="+", default=["default", "volcano", "nexus"], 